@@ -0,0 +1,75 @@
+"""
+Generated fixture projects covering the detection paths of the project classes.
+
+Every fixture is a function writing files into an (empty) project directory.
+Contents are fixed, so that results are comparable between commits.
+"""
+from pathlib import Path
+
+LARGE_ENV_DEPENDENCIES = 2000
+
+
+def write(path, files):
+    for name, content in files.items():
+        f = Path(path) / name
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.write_text(content)
+
+
+def environment_yml(*deps, pip=()):
+    lines = ["channels:", "  - conda-forge", "dependencies:"]
+    lines.extend(f"  - {dep}" for dep in deps)
+    if pip:
+        lines.append("  - pip:")
+        lines.extend(f"    - {dep}" for dep in pip)
+    return "\n".join(lines) + "\n"
+
+
+FIXTURES = {
+    "empty": {},
+    "python-requirements": {"requirements.txt": "numpy\npandas>=2\n"},
+    "python-pyproject": {"pyproject.toml": '[project]\nname = "fixture"\nversion = "0.1"\nrequires-python = ">=3.11"\n'},
+    "python-setup": {"setup.py": "from setuptools import setup\nsetup(name='fixture')\n"},
+    "python-pipfile": {"Pipfile": "[packages]\nrequests = \"*\"\n"},
+    "python-pipfile-lock": {"Pipfile": "[packages]\n", "Pipfile.lock": "{}\n"},
+    "python-runtime": {"runtime.txt": "python-3.10\n"},
+    "python-runtime-dated": {"runtime.txt": "python-3.10-2024-01-15\n", "requirements.txt": "numpy\n"},
+    "python-version-file": {".python-version": "3.12\n", "requirements.txt": "numpy\n"},
+    "python-binder": {"binder/requirements.txt": "numpy\n", "binder/runtime.txt": "python-3.11\n", "requirements.txt": "ignored\n"},
+    "python-dotbinder": {".binder/pyproject.toml": '[project]\nname = "fixture"\nversion = "0.1"\n'},
+    "conda-python": {"environment.yml": environment_yml("python=3.11", "numpy", pip=["requests"])},
+    "conda-no-python": {"environment.yml": environment_yml("numpy")},
+    "conda-r": {"environment.yml": environment_yml("r-base=4.3", "r-ggplot2", "r-dplyr")},
+    "conda-large": {"environment.yml": environment_yml(
+        "python=3.11", "r-base=4.3",
+        *(f"package-{i}>={i % 10}.{i % 7}" for i in range(LARGE_ENV_DEPENDENCIES)),
+        pip=[f"pip-package-{i}" for i in range(LARGE_ENV_DEPENDENCIES // 10)],
+    )},
+    "conda-binder": {"binder/environment.yml": environment_yml("python=3.12"), "binder/install.R": "install.packages('x')\n"},
+    "r-runtime": {"runtime.txt": "r-2024-01-15\n", "install.R": "install.packages('ggplot2')\n"},
+    "r-runtime-versioned": {"runtime.txt": "r-4.3-2024-01-15\n"},
+    "r-description": {"DESCRIPTION": "Package: fixture\nVersion: 0.1\n"},
+    "r-dotbinder": {".binder/runtime.txt": "r-2024-01-15\n", ".binder/install.R": "install.packages('x')\n"},
+    "julia-project": {"Project.toml": '[deps]\nExample = "7876af07-990d-54b4-ab0e-23690620f79a"\n\n[compat]\njulia = "1.10"\n'},
+    "julia-no-compat": {"Project.toml": "[deps]\n"},
+    "julia-binder": {"binder/JuliaProject.toml": '[compat]\njulia = "1.9"\n'},
+    "mixed": {
+        "environment.yml": environment_yml("python=3.11", "r-base=4.3"),
+        "requirements.txt": "numpy\n",
+        "install.R": "install.packages('x')\n",
+        "Project.toml": '[compat]\njulia = "1.10"\n',
+    },
+}
+
+
+def create_fixtures(base_path, names=None):
+    """Write all (or the named) fixtures into subdirectories of base_path and return their paths."""
+    paths = {}
+    for name, files in FIXTURES.items():
+        if names and name not in names:
+            continue
+        path = Path(base_path) / name
+        path.mkdir(parents=True)
+        write(path, files)
+        paths[name] = path
+    return paths
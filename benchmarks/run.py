@@ -0,0 +1,153 @@
+"""
+Offline benchmarks for repo2kernel's own overhead.
+
+Times `detect`, `create --dry-run` and `create` (against fake toolchains, see shims.py)
+for every fixture in fixtures.py, and stores the results as JSON.
+
+Usage (from the repository root):
+
+    python -m benchmarks.run [--repeat N] [--latency SECONDS] [--output FILE] [fixture ...]
+    python -m benchmarks.run --compare OLD.json NEW.json
+"""
+from pathlib import Path
+from unittest import mock
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+from main import CliCommands, SUCCESS
+from lib import RCondaProject, JuliaProject
+
+from .fixtures import FIXTURES, create_fixtures
+from .shims import write_shims, shim_environment
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Responses for the network lookups done during detection and creation
+JULIA_VERSIONS = ["1.6.7", "1.9.4", "1.10.5", "1.11.1"]
+RSPM_SNAPSHOT_URL = "https://packagemanager.posit.co/cran/2024-01-15"
+
+
+@contextlib.contextmanager
+def offline():
+    """Replace the network lookups of the project classes with fixed responses."""
+    with mock.patch.object(JuliaProject, "all_julias", JULIA_VERSIONS), \
+         mock.patch.object(RCondaProject, "get_rspm_snapshot_url", lambda self, max_days_prior=7: RSPM_SNAPSHOT_URL):
+        yield
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def measure(func, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return {
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "mean": statistics.mean(runs),
+        "runs": runs,
+    }
+
+
+def check(kind, fixture_path, code):
+    if code != SUCCESS:
+        raise RuntimeError(f"{kind} failed for fixture {fixture_path.name} with exit code {code}")
+
+
+def benchmarks(fixture_path, base_env_dir):
+    def detect():
+        with contextlib.redirect_stdout(io.StringIO()):
+            CliCommands.detect(directory=str(fixture_path))
+
+    def create_dry_run():
+        code = CliCommands.create(directory=str(fixture_path), dry_run=True, base_env_dir=str(base_env_dir))
+        check("create --dry-run", fixture_path, code)
+
+    def create():
+        with tempfile.TemporaryDirectory(dir=base_env_dir) as env_dir:
+            code = CliCommands.create(directory=str(fixture_path), base_env_dir=env_dir, kernel_user=True)
+        check("create", fixture_path, code)
+
+    return {"detect": detect, "create-dry-run": create_dry_run, "create": create}
+
+
+def run(fixtures=None, repeat=5, latency=0.0):
+    CliCommands.log.setLevel(logging.WARNING)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, offline():
+        tmp = Path(tmp)
+        shims = write_shims(tmp / "shims")
+        base_env_dir = tmp / "envs"
+        base_env_dir.mkdir()
+        with mock.patch.dict(os.environ, shim_environment(shims, latency), clear=True):
+            for name, path in create_fixtures(tmp / "fixtures", fixtures).items():
+                for kind, func in benchmarks(path, base_env_dir).items():
+                    results[f"{kind}/{name}"] = measure(func, repeat)
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "latency": latency,
+        "results": results,
+    }
+
+
+def compare(old_file, new_file):
+    with open(old_file) as f:
+        old = json.load(f)["results"]
+    with open(new_file) as f:
+        new = json.load(f)["results"]
+    width = max(len(name) for name in old | new)
+    print(f"{'benchmark':<{width}}  {'old (ms)':>10}  {'new (ms)':>10}  {'ratio':>6}")
+    for name in sorted(old | new):
+        if name not in old or name not in new:
+            print(f"{name:<{width}}  {'-':>10}  {'-':>10}  {'-':>6}")
+            continue
+        o = old[name]["median"] * 1000
+        n = new[name]["median"] * 1000
+        print(f"{name:<{width}}  {o:>10.2f}  {n:>10.2f}  {n / o if o else float('nan'):>6.2f}")
+
+
+def get_argparser():
+    parser = argparse.ArgumentParser(prog="benchmarks", description="Run repo2kernel's offline benchmark suite.")
+    parser.add_argument("fixtures", nargs="*", help=f"fixtures to run (default: all). Available: {', '.join(FIXTURES)}")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs per benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds every fake toolchain command sleeps")
+    parser.add_argument("--output", help=f"JSON file to write results to (default: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files instead of running")
+    return parser
+
+
+if __name__ == "__main__":
+    parser = get_argparser()
+    args = parser.parse_args()
+    if unknown := set(args.fixtures) - set(FIXTURES):
+        parser.error(f"unknown fixtures: {', '.join(sorted(unknown))}")
+    if args.compare:
+        compare(*args.compare)
+    else:
+        results = run(args.fixtures, repeat=args.repeat, latency=args.latency)
+        output = Path(args.output or RESULTS_DIR / f"{results['commit'][:12] or 'results'}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        for name, result in results["results"].items():
+            print(f"{name}: {result['median'] * 1000:.2f} ms")
+        print(f"Results written to {output}")
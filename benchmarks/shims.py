@@ -0,0 +1,67 @@
+"""
+Fake toolchain executables for running repo2kernel offline.
+
+Every shim sleeps for $REPO2KERNEL_BENCH_LATENCY seconds and exits successfully.
+Shims for commands that create environments also create the target directory,
+so that later steps see the environment as existing.
+"""
+from pathlib import Path
+import os
+import stat
+
+LATENCY_ENV_VAR = "REPO2KERNEL_BENCH_LATENCY"
+
+SLEEP = f'sleep "${{{LATENCY_ENV_VAR}:-0}}"\n'
+
+# create a fake environment with a python shim in directory $1
+MAKE_ENV = """
+make_env() {
+  mkdir -p "$1/bin"
+  cp "$0" "$1/bin/python"
+}
+"""
+
+# create the argument following -p for `conda create` and `conda env create`
+CONDA_CREATE = MAKE_ENV + """
+case "$1 $2" in
+  "env create"|"create "*)
+    while [ $# -gt 0 ]; do
+      if [ "$1" = "-p" ]; then make_env "$2"; mkdir -p "$2/conda-meta"; fi
+      shift
+    done
+    ;;
+esac
+"""
+
+# create the venv directory for `uv venv PATH`
+UV_VENV = MAKE_ENV + """
+if [ "$1" = "venv" ]; then make_env "$2"; fi
+"""
+
+SHIMS = {
+    "conda": SLEEP + CONDA_CREATE,
+    "uv": SLEEP + UV_VENV,
+    "uvx": SLEEP,
+    "juliaup": SLEEP,
+    "julia": SLEEP,
+    "R": SLEEP,
+}
+
+
+def write_shims(directory):
+    """Write all shims to `directory` and return the directory."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, body in SHIMS.items():
+        shim = directory / name
+        shim.write_text("#!/bin/sh\n" + body)
+        shim.chmod(shim.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return directory
+
+
+def shim_environment(directory, latency=0.0):
+    """Return a copy of os.environ with the shims first on PATH."""
+    return os.environ | {
+        "PATH": f"{directory}{os.pathsep}{os.environ.get('PATH', '')}",
+        LATENCY_ENV_VAR: str(latency),
+    }
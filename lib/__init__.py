@@ -5,3 +5,11 @@ from .project.julia import JuliaProject as JuliaProject
 
 
 from .contentproviders.dataverse import Dataverse as Dataverse
+from .contentproviders.zenodo import Zenodo as Zenodo
+from .contentproviders.dispatch import preferred_provider as preferred_provider
+
+from .dedupe import Deduplicator as Deduplicator
+from .runner import CommandRunner as CommandRunner
+from .watch import Watcher as Watcher
+from .detect import DetectCache as DetectCache, detect_tree as detect_tree, project_roots as project_roots
+from .plan import BuildPlan as BuildPlan, PlanExecutor as PlanExecutor
@@ -1,23 +1,87 @@
 from repo2docker.contentproviders import Dataverse as BaseDataverse
-import os
+from repo2docker.contentproviders.doi import DoiProvider
+from urllib.parse import urlparse
+from .doi import CachedDoiMixin
+import json
 
-class Dataverse(BaseDataverse):
+
+class Dataverse(CachedDoiMixin, BaseDataverse):
     """
     Provide contents of a Dataverse dataset.
 
     This class extends the default Dataverse class from repo2docker to allow adding
     arbitrary dataverse hosts using a custom json file.
+
+    Installation lists are loaded once per process, and installations are indexed by
+    host so that detection does not depend on the number of known installations.
     """
 
-    settings_files = set()
+    settings_files = []
+
+    # Caches shared by all instances: repo2docker's own installation list, parsed
+    # installations per settings file, and the merged host index.
+    _base_hosts = None
+    _parsed_settings = {}
+    _host_index = None
 
     def __init__(self):
-        super().__init__()
-        for settings_file in self.settings_files:
-            # TODO: error handling
-            with open(settings_file) as fp:
-                self.hosts.extend(json.load(fp)["installations"])
+        if Dataverse._base_hosts is None:
+            super().__init__()
+            if hasattr(self, "load_hosts"): # newer repo2docker versions download the list lazily
+                self.load_hosts()
+            Dataverse._base_hosts = self.hosts
+        else:
+            DoiProvider.__init__(self)
+        self.host_index = self.installations_by_host()
+        self.hosts = list(self.host_index.values())
 
     @classmethod
     def add_settings_file(cls, file):
-        return setattr(cls, "settings_file", cls.settings_files.add(file))
+        if file not in cls.settings_files:
+            cls.settings_files.append(file)
+            cls._host_index = None
+
+    @classmethod
+    def parse_settings_file(cls, file):
+        if file not in cls._parsed_settings:
+            try:
+                with open(file) as fp:
+                    cls._parsed_settings[file] = json.load(fp)["installations"]
+            except (OSError, ValueError, KeyError) as e:
+                raise RuntimeError(f"Could not read Dataverse installations from {file}: {e!r}")
+        return cls._parsed_settings[file]
+
+    @staticmethod
+    def installation_host(installation):
+        # repo2docker's installation list has used both a 'url' and a 'hostname' key
+        return installation.get("hostname") or urlparse(installation["url"]).netloc
+
+    @classmethod
+    def installations_by_host(cls):
+        """
+        Return a dict mapping host (netloc) to installation.
+
+        Installations from settings files replace earlier ones for the same host.
+        """
+        if cls._host_index is None:
+            index = {}
+            for installation in cls._base_hosts or []:
+                index[cls.installation_host(installation)] = installation
+            for file in cls.settings_files:
+                for installation in cls.parse_settings_file(file):
+                    installation.setdefault("hostname", cls.installation_host(installation))
+                    index[installation["hostname"]] = installation
+            cls._host_index = index
+        return cls._host_index
+
+    def detect(self, spec, ref=None, extra_args=None):
+        """
+        Detect if given spec is hosted on dataverse
+
+        Equivalent to repo2docker's Dataverse.detect, but uses a dict lookup instead
+        of scanning all known installations.
+        """
+        url = self.doi2url(spec)
+        if urlparse(url).netloc not in self.host_index:
+            return None
+        return url
@@ -0,0 +1,44 @@
+from repo2docker.contentproviders import Local, Git
+from repo2docker.utils import is_doi
+from urllib.parse import urlparse
+from .dataverse import Dataverse
+from .zenodo import Zenodo
+import os
+
+# Hosts that only serve git repositories
+GIT_HOSTS = {"github.com", "gitlab.com", "bitbucket.org", "codeberg.org", "git.sr.ht"}
+GIT_SCHEMES = {"git", "ssh", "git+ssh", "git+https"}
+
+# Hosts recognized by repo2docker's Zenodo content provider
+ZENODO_HOSTS = {"zenodo.org", "sandbox.zenodo.org", "data.caltech.edu"}
+
+
+def preferred_provider(url, providers):
+    """
+    Guess the content provider for `url` from its scheme, host or DOI target.
+
+    Returns one of the classes in `providers`, or None if the URL is ambiguous and
+    all providers should be probed. DOIs are resolved once (and cached), so providers
+    probed afterwards do not resolve them again.
+    """
+    def pick(cls):
+        return next((p for p in providers if issubclass(p, cls)), None)
+
+    if os.path.isdir(url):
+        return pick(Local)
+
+    if url.startswith("git@"):
+        return pick(Git)
+
+    if is_doi(url):
+        url = Zenodo().doi2url(url)
+
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if parsed.scheme in GIT_SCHEMES or parsed.path.endswith(".git") or host in GIT_HOSTS:
+        return pick(Git)
+    if host in ZENODO_HOSTS:
+        return pick(Zenodo)
+    if parsed.netloc in Dataverse().host_index:
+        return pick(Dataverse)
+    return None
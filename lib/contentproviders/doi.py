@@ -0,0 +1,69 @@
+from repo2docker.utils import is_doi, normalize_doi
+from pathlib import Path
+import json
+import os
+import time
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "repo2kernel"
+
+
+class DoiCache:
+    """
+    On-disk cache of DOI to URL resolutions.
+
+    Entries expire after `ttl` seconds. The cache file is read once per process
+    and rewritten atomically whenever a new resolution is added.
+    """
+
+    default_ttl = 24 * 60 * 60
+
+    def __init__(self, path=CACHE_DIR / "doi.json", ttl=default_ttl):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._entries = None
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, doi):
+        entry = self.entries.get(normalize_doi(doi))
+        if entry and time.time() - entry["time"] < self.ttl:
+            return entry["url"]
+        return None
+
+    def set(self, doi, url):
+        self.entries[normalize_doi(doi)] = {"url": url, "time": time.time()}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass # the cache is an optimization only
+
+
+class CachedDoiMixin:
+    """
+    Mixin for repo2docker DoiProvider subclasses that caches `doi2url` results on disk.
+    """
+
+    doi_cache = DoiCache()
+
+    def doi2url(self, doi):
+        if not is_doi(doi):
+            return doi
+
+        url = self.doi_cache.get(doi)
+        if url is None:
+            url = super().doi2url(doi)
+            if url != doi: # only cache successful resolutions
+                self.doi_cache.set(doi, url)
+        return url
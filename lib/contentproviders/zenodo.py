@@ -0,0 +1,10 @@
+from repo2docker.contentproviders import Zenodo as BaseZenodo
+from .doi import CachedDoiMixin
+
+
+class Zenodo(CachedDoiMixin, BaseZenodo):
+    """
+    Provide contents of a Zenodo deposit.
+
+    This class extends the default Zenodo class from repo2docker to cache DOI resolutions.
+    """
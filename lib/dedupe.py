@@ -0,0 +1,225 @@
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import stat
+import sys
+
+# Name of the index file kept in the root of --base-env-dir
+INDEX_FILE = ".repo2kernel-dedupe.json"
+INDEX_VERSION = 1
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# ioctl request number for FICLONE on Linux (see ioctl_ficlone(2))
+FICLONE = 0x40049409
+
+# path_type values in conda-meta/*.json for files conda itself hardlinks from
+# the package cache. Files of any other type (e.g. 'softlink', or files with a
+# prefix_placeholder that conda rewrites in place) are left alone.
+CONDA_LINKABLE_PATH_TYPES = {"hardlink", "pyc_file"}
+
+# Subdirectories of a Julia depot with content-addressed, immutable files. Julia
+# rewrites other depot files (environments/*/Manifest.toml, logs, ...) in place,
+# so hardlinking them would leak changes from one environment into the others.
+JULIA_DEPOT_IMMUTABLE_DIRS = ["packages", "artifacts"]
+JULIA_DEPOT_MARKERS = ["registries", "environments", "compiled"]
+
+
+class Deduplicator:
+    """
+    Replace identical files under a base environment directory with hardlinks or reflinks.
+
+    Hashes are kept in a persisted index keyed by path and validated against
+    (device, inode, size, mtime), so re-runs only hash new or modified files.
+    Files are only hashed when another file of the same size exists on the same device.
+    In hardlink mode only files with the same modification time are merged (so that
+    timestamp based .pyc checks stay valid), and only the immutable parts of Julia
+    depots are considered.
+    """
+
+    link_modes = ["hardlink", "reflink"]
+
+    def __init__(self, base_path, log, link_mode="hardlink", min_size=1, dry_run=False):
+        if link_mode not in self.link_modes:
+            raise ValueError(f"Unsupported link mode: {link_mode}")
+        self.base_path = Path(base_path)
+        self.index_path = self.base_path / INDEX_FILE
+        self.log = log
+        self.link_mode = link_mode
+        self.min_size = min_size
+        self.dry_run = dry_run
+        self.previous_index = {}
+        self.index = {}
+        self.stats = {"files": 0, "hashed": 0, "linked": 0, "saved_bytes": 0}
+
+    def load_index(self):
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.log.warning(f"Ignoring unreadable dedupe index {self.index_path}: {e}")
+            return {}
+        if data.get("version") != INDEX_VERSION:
+            return {}
+        return data.get("files", {})
+
+    def save_index(self):
+        if self.dry_run:
+            return
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.index}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def conda_excluded_files(self, prefix):
+        """Return the set of files in conda env `prefix` that must not be linked."""
+        excluded = set()
+        for meta_file in (prefix / "conda-meta").glob("*.json"):
+            try:
+                with open(meta_file) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for rel_path in meta.get("no_link", []) or []:
+                excluded.add(str(prefix / rel_path))
+            for entry in (meta.get("paths_data") or {}).get("paths", []):
+                if entry.get("prefix_placeholder") or entry.get("path_type") not in CONDA_LINKABLE_PATH_TYPES:
+                    excluded.add(str(prefix / entry["_path"]))
+        return excluded
+
+    @staticmethod
+    def is_julia_depot(directory):
+        return (directory / "packages").is_dir() and any((directory / d).is_dir() for d in JULIA_DEPOT_MARKERS)
+
+    def scan(self):
+        """Yield (path, stat_result) for every regular file eligible for deduplication."""
+        excluded = set()
+        stack = [self.base_path]
+        while stack:
+            directory = stack.pop()
+            if (directory / "conda-meta").is_dir():
+                excluded |= self.conda_excluded_files(directory)
+            if self.link_mode == "hardlink" and self.is_julia_depot(directory):
+                stack.extend(directory / d for d in JULIA_DEPOT_IMMUTABLE_DIRS if (directory / d).is_dir())
+                continue
+            try:
+                entries = list(os.scandir(directory))
+            except OSError as e:
+                self.log.warning(f"Skipping {directory}: {e}")
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != "conda-meta":
+                        stack.append(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    if entry.path == str(self.index_path) or entry.path in excluded:
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                    if st.st_size >= self.min_size:
+                        yield entry.path, st
+
+    def file_hash(self, path, st, hashed_inodes):
+        """Return the content hash of `path`, reusing the index where it is still valid."""
+        key = (st.st_dev, st.st_ino)
+        if key in hashed_inodes:
+            return hashed_inodes[key]
+        cached = self.previous_index.get(path)
+        if cached and cached[:4] == [st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns]:
+            digest = cached[4]
+        else:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                while chunk := f.read(HASH_CHUNK_SIZE):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            self.stats["hashed"] += 1
+        hashed_inodes[key] = digest
+        return digest
+
+    def link_key(self, st):
+        """Files can only be merged if their link keys are equal."""
+        if self.link_mode == "reflink":
+            return None
+        # Hardlinks share permissions, ownership and modification time, only merge files that agree on them
+        return (stat.S_IMODE(st.st_mode), st.st_uid, st.st_gid, st.st_mtime_ns)
+
+    def replace_with_link(self, source, target):
+        tmp_path = f"{target}.repo2kernel-dedupe"
+        try:
+            if self.link_mode == "hardlink":
+                os.link(source, tmp_path)
+            else:
+                import fcntl
+                with open(source, "rb") as src, open(tmp_path, "wb") as dst:
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                shutil.copystat(target, tmp_path)
+            os.replace(tmp_path, target)
+        except OSError:
+            if os.path.lexists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def run(self):
+        if self.link_mode == "reflink" and not sys.platform.startswith("linux"):
+            raise RuntimeError("Reflinks are only supported on Linux.")
+
+        self.previous_index = self.load_index()
+        self.index = {}
+
+        by_size = {}
+        for path, st in self.scan():
+            self.stats["files"] += 1
+            by_size.setdefault((st.st_dev, st.st_size), []).append((path, st))
+
+        hashed_inodes = {}
+        for (dev, size), files in by_size.items():
+            if len({st.st_ino for _, st in files}) < 2:
+                # nothing to merge, but keep still valid hashes for later runs
+                for path, st in files:
+                    cached = self.previous_index.get(path)
+                    if cached and cached[:4] == [st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns]:
+                        self.index[path] = cached
+                continue
+            by_hash = {}
+            for path, st in files:
+                digest = self.file_hash(path, st, hashed_inodes)
+                self.index[path] = [st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, digest]
+                by_hash.setdefault(digest, []).append((path, st))
+            for group in by_hash.values():
+                by_key = {}
+                for path, st in group:
+                    by_key.setdefault(self.link_key(st), []).append((path, st))
+                for linkable in by_key.values():
+                    self.merge(linkable)
+
+        self.save_index()
+        self.log.info(
+            f"Scanned {self.stats['files']} files, hashed {self.stats['hashed']}, "
+            f"{'would link' if self.dry_run else 'linked'} {self.stats['linked']} "
+            f"saving {self.stats['saved_bytes']} bytes."
+        )
+        return self.stats
+
+    def merge(self, group):
+        # Prefer the inode with the most links as source (e.g. the copy shared with the conda pkgs cache)
+        group.sort(key=lambda f: f[1].st_nlink, reverse=True)
+        source, source_st = group[0]
+        for path, st in group[1:]:
+            if st.st_ino == source_st.st_ino:
+                continue
+            self.log.debug(f"Linking {path} -> {source}")
+            if not self.dry_run:
+                try:
+                    self.replace_with_link(source, path)
+                except OSError as e:
+                    self.log.warning(f"Could not link {path} to {source}: {e}")
+                    continue
+                new_st = os.stat(path)
+                self.index[path] = [new_st.st_dev, new_st.st_ino, new_st.st_size, new_st.st_mtime_ns, self.index[source][4]]
+            self.stats["linked"] += 1
+            if st.st_nlink == 1:
+                self.stats["saved_bytes"] += st.st_size
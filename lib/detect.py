@@ -0,0 +1,143 @@
+from .contentproviders.doi import CACHE_DIR
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+import json
+import logging
+import os
+
+DEFAULT_CACHE_FILE = CACHE_DIR / "detect.json"
+CACHE_VERSION = 2
+
+# Files read by detection that are not necessarily reported as dependency files
+FINGERPRINT_FILES = ["runtime.txt", ".python-version"]
+
+
+def detect_project(directory, project_types):
+    """Return a JSON serializable summary of the projects detected in directory."""
+    log = logging.getLogger("repo2kernel")
+    summary = {
+        "directory": str(directory),
+        "types": [],
+        "dependency_files": [],
+        "interpreters": {},
+        "runtime_date": None,
+    }
+    for project_cls in project_types:
+        try:
+            project = project_cls(directory, "", log, dry_run=True)
+            if not project.detected:
+                continue
+            summary["types"].append(project.project_type)
+            for f in [*project.watched_files(), project.binder_path("runtime.txt")]:
+                if f.exists() and str(f) not in summary["dependency_files"]:
+                    summary["dependency_files"].append(str(f))
+            summary["interpreters"][project.project_type] = project.interpreter_version()
+            if date := project.runtime[2]:
+                summary["runtime_date"] = date.isoformat()
+        except Exception as e: # report broken projects instead of aborting the whole run
+            summary.setdefault("errors", {})[project_cls.project_type] = f"{e.__class__.__name__}: {e}"
+    return summary
+
+
+def fingerprint(directory, files=()):
+    """
+    Modification times of the directory and its binder directories, and modification
+    times and sizes of `files` and of FINGERPRINT_FILES, used to invalidate cached results.
+    """
+    directory = Path(directory)
+    directories = [directory, directory / "binder", directory / ".binder"]
+    result = []
+    for d in directories:
+        try:
+            result.append(d.stat().st_mtime_ns)
+        except FileNotFoundError:
+            result.append(None)
+    for f in [*files, *(d / name for d in directories for name in FINGERPRINT_FILES)]:
+        try:
+            st = os.stat(f)
+            result.append([st.st_mtime_ns, st.st_size])
+        except FileNotFoundError:
+            result.append(None)
+    return result
+
+
+def project_roots(directory, depth=1):
+    """Yield the non-hidden directories exactly `depth` levels below directory."""
+    if depth == 0:
+        yield directory
+        return
+    try:
+        entries = sorted(os.scandir(directory), key=lambda e: e.name)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir() and not entry.name.startswith("."):
+            yield from project_roots(Path(entry.path), depth - 1)
+
+
+class DetectCache:
+    """Detection results per directory, persisted as JSON and keyed on the directory's fingerprint."""
+
+    def __init__(self, path=DEFAULT_CACHE_FILE):
+        self.path = Path(path) if path else None
+        self.entries = {}
+        if self.path:
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    self.entries = data["entries"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def get(self, directory):
+        entry = self.entries.get(str(directory))
+        if entry and entry["fingerprint"] == fingerprint(directory, entry["summary"]["dependency_files"]):
+            return entry["summary"]
+        return None
+
+    def set(self, directory, summary):
+        self.entries[str(directory)] = {"fingerprint": fingerprint(directory, summary["dependency_files"]), "summary": summary}
+
+    def save(self):
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"version": CACHE_VERSION, "entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+
+def detect_tree(directories, project_types, cache=None, jobs=None):
+    """
+    Yield detection summaries for directories, skipping unchanged directories found in cache.
+
+    Uncached directories are detected in parallel in a process pool with `jobs` workers.
+    Summaries with errors are not cached, as the errors may be transient (e.g. network failures).
+    """
+    cache = cache or DetectCache(None)
+    pending = []
+    for directory in directories:
+        if (summary := cache.get(directory)) is not None:
+            yield summary
+        else:
+            pending.append(directory)
+
+    detect = partial(detect_project, project_types=project_types)
+    if len(pending) == 1 or jobs == 1:
+        for directory in pending:
+            summary = detect(directory)
+            if "errors" not in summary:
+                cache.set(directory, summary)
+            yield summary
+    elif pending:
+        quiet = logging.getLogger("repo2kernel").setLevel
+        with ProcessPoolExecutor(max_workers=jobs, initializer=quiet, initargs=(logging.WARNING,)) as pool:
+            summaries = pool.map(detect, pending, chunksize=16)
+            for directory, summary in zip(pending, summaries):
+                if "errors" not in summary:
+                    cache.set(directory, summary)
+                yield summary
+    cache.save()
@@ -0,0 +1,264 @@
+from pathlib import Path
+import hashlib
+import json
+import time
+
+STATE_DIR = ".repo2kernel-state"
+
+# Project methods a step may call, and the arguments that may be passed to them
+STEP_ACTIONS = {"create_environment", "create_kernel", "update_environment"}
+STEP_ARGUMENTS = {"interpreter_base_dir", "precompile", "user", "name", "display_name", "prefix"}
+PROJECT_OPTIONS = {"project_path", "env_base_path", "env_type", "env_name"}
+
+
+def file_digest(path):
+    """Return the sha256 of a file's contents, or None if it does not exist."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+class Step:
+    """
+    A single step of a build plan: calling `action` on a project.
+
+    `project` describes how to instantiate the project (class name and constructor
+    options), so that plans can be serialized. `inputs` maps names to digests or
+    values, `outputs` lists paths the step creates. If only inputs listed in
+    `update_inputs` changed since the last run and the outputs exist, the executor
+    calls `update_action` instead of `action`, with the same arguments. `commands`
+    are the commands the step will run, where they are known in advance.
+    """
+
+    fields = ("name", "project", "action", "arguments", "inputs", "outputs", "depends_on", "update_action", "update_inputs", "commands")
+
+    def __init__(self, name, project, action, arguments=None, inputs=None, outputs=None, depends_on=None, update_action=None, update_inputs=None, commands=None):
+        self.name = name
+        self.project = project
+        self.action = action
+        self.arguments = arguments or {}
+        self.inputs = inputs or {}
+        self.outputs = [str(o) for o in outputs or []]
+        self.depends_on = depends_on or []
+        self.update_action = update_action
+        self.update_inputs = update_inputs or []
+        self.commands = commands or []
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a step from the output of to_dict, raising a RuntimeError if it calls anything but the known actions."""
+        name = data.get("name")
+        if unknown_fields := data.keys() - set(cls.fields):
+            raise RuntimeError(f"Unknown fields in build step {name}: {sorted(unknown_fields)}")
+        if data.get("action") not in STEP_ACTIONS or data.get("update_action") not in STEP_ACTIONS | {None}:
+            raise RuntimeError(f"Build step {name} has an unsupported action, must be one of {sorted(STEP_ACTIONS)}")
+        project = data.get("project")
+        if not isinstance(project, dict) or not isinstance(project.get("options"), dict) or project["options"].keys() != PROJECT_OPTIONS:
+            raise RuntimeError(f"Build step {name} must describe its project by class and options {sorted(PROJECT_OPTIONS)}")
+        arguments = data.get("arguments") or {}
+        if not isinstance(arguments, dict) or arguments.keys() - STEP_ARGUMENTS:
+            raise RuntimeError(f"Build step {name} has unsupported arguments, must be among {sorted(STEP_ARGUMENTS)}")
+        if not all(isinstance(v, (str, bool, type(None))) for v in arguments.values()):
+            raise RuntimeError(f"Build step {name} has arguments that are not strings or booleans")
+        return cls(**data)
+
+    def to_dict(self):
+        return {f: getattr(self, f) for f in self.fields}
+
+
+class BuildPlan:
+    """An ordered set of steps with dependencies between them."""
+
+    def __init__(self, steps=()):
+        self.steps = {}
+        for step in steps:
+            self.add(step)
+
+    def add(self, step):
+        if step.name in self.steps:
+            raise RuntimeError(f"Duplicate build step: {step.name}")
+        self.steps[step.name] = step
+        return step
+
+    def ordered(self):
+        """Return the steps in dependency order, keeping the order they were added in otherwise."""
+        done = set()
+        result = []
+        pending = list(self.steps.values())
+        while pending:
+            ready = [s for s in pending if all(d in done for d in s.depends_on)]
+            if not ready:
+                missing = {d for s in pending for d in s.depends_on if d not in self.steps}
+                raise RuntimeError(f"Build plan has unknown dependencies {missing} or a cycle.")
+            step = ready[0]
+            pending.remove(step)
+            done.add(step.name)
+            result.append(step)
+        return result
+
+    def to_dict(self):
+        return {"steps": [s.to_dict() for s in self.ordered()]}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(Step.from_dict(s) for s in data["steps"])
+
+    def state_file(self):
+        """Return the file the executor records the state of this plan's steps in, or None for an empty plan."""
+        for step in self.steps.values():
+            options = step.project["options"]
+            return Path(options["env_base_path"]) / STATE_DIR / f"{options['env_name']}.json"
+        return None
+
+    @classmethod
+    def for_projects(cls, projects, interpreter_base_dir="", precompile=False, kernel_options=None):
+        """
+        Create the plan for building the environments and kernels of detected projects.
+
+        `projects` are instances as returned by detection, with the conda base project
+        (if any) first. They are only used to compute inputs and outputs, the executor
+        creates its own instances.
+        """
+        # store absolute paths only, so that the plan does not depend on the directory it is executed from
+        kernel_options = dict(kernel_options or {})
+        if kernel_options.get("prefix"):
+            kernel_options["prefix"] = str(Path(kernel_options["prefix"]).resolve())
+        if interpreter_base_dir:
+            interpreter_base_dir = str(Path(interpreter_base_dir).resolve())
+        plan = cls()
+        base_step = None
+        for project in projects:
+            env_path = project.env_path.resolve()
+            spec = {
+                "class": project.__class__.__name__,
+                "options": {
+                    "project_path": str(project.project_path.resolve()),
+                    "env_base_path": str(Path(project.env_base_path).resolve()),
+                    # language projects share the conda base project's environment, if there is one
+                    "env_type": "conda" if base_step else "",
+                    "env_name": project._env_name,
+                },
+            }
+            files = {str(f.resolve()): file_digest(f) for f in [*project.watched_files(), project.binder_path("runtime.txt")] if f.exists()}
+            if project.project_type == "conda":
+                arguments = {}
+                commands = project.create_environment_commands()
+            else:
+                arguments = {"interpreter_base_dir": interpreter_base_dir, "precompile": precompile}
+                commands = []
+            env_step = plan.add(Step(
+                f"{project.project_type}-environment",
+                spec,
+                "create_environment",
+                arguments=arguments,
+                inputs={**files, **arguments, "env_type": project.env_type, "interpreter_version": project.interpreter_version()},
+                outputs=[env_path] if project.project_type != "julia" else [],
+                depends_on=[base_step.name] if base_step else [],
+                update_action="update_environment",
+                update_inputs=list(files),
+                commands=commands,
+            ))
+            if project.project_type == "conda":
+                base_step = env_step
+                continue
+
+            kernelspec = project.kernelspec_path(**kernel_options)
+            plan.add(Step(
+                f"{project.project_type}-kernel",
+                spec,
+                "create_kernel",
+                arguments=kernel_options,
+                inputs={**kernel_options, "env_path": str(env_path)},
+                outputs=[kernelspec.resolve() / "kernel.json"] if kernelspec else [],
+                depends_on=[env_step.name],
+            ))
+        return plan
+
+
+class PlanExecutor:
+    """
+    Execute a BuildPlan, skipping steps that are up to date.
+
+    A step is up to date if its inputs are unchanged since it last succeeded, all its
+    outputs exist, and none of the steps it depends on were executed in this run.
+    The inputs of successful steps are recorded in `state_file`, if given.
+    """
+
+    def __init__(self, plan, state_file, project_types, log, dry_run=False, **project_kwargs):
+        self.plan = plan
+        self.state_file = Path(state_file) if state_file else None
+        self.project_types = {cls.__name__: cls for cls in project_types}
+        self.log = log
+        self.dry_run = dry_run
+        self.project_kwargs = project_kwargs
+        self.projects = {}
+        self.results = []
+        self.state = {}
+        if self.state_file:
+            try:
+                with open(self.state_file) as f:
+                    self.state = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    def project(self, step):
+        """Return the project instance for a step, creating it on first use."""
+        key = json.dumps(step.project, sort_keys=True)
+        if key not in self.projects:
+            if step.project["class"] not in self.project_types:
+                raise RuntimeError(f"Unknown project type in build step {step.name}: {step.project['class']}")
+            cls = self.project_types[step.project["class"]]
+            options = step.project["options"]
+            self.projects[key] = cls(
+                options["project_path"], options["env_base_path"], self.log,
+                env_type=options["env_type"], env_name=options["env_name"],
+                dry_run=self.dry_run, **self.project_kwargs
+            )
+        return self.projects[key]
+
+    def save_state(self):
+        if self.dry_run or not self.state_file:
+            return
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_file.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        tmp_path.replace(self.state_file)
+
+    def changed_inputs(self, step):
+        previous = self.state.get(step.name, {}).get("inputs")
+        if previous is None:
+            return None
+        return {k for k in previous.keys() | step.inputs.keys() if previous.get(k) != step.inputs.get(k)}
+
+    def execute(self):
+        executed = set()
+        for step in self.plan.ordered():
+            changed = self.changed_inputs(step)
+            outputs_exist = all(Path(o).exists() for o in step.outputs)
+            if changed == set() and outputs_exist and not executed.intersection(step.depends_on):
+                self.log.info(f"Step {step.name} is up to date.")
+                self.results.append({"name": step.name, "status": "skipped", "seconds": 0})
+                continue
+
+            # an existing output whose only changes are in dependency files (or in steps it depends on) is updated in place
+            if changed is not None and outputs_exist and step.update_action and changed <= set(step.update_inputs):
+                action, status = step.update_action, "updated"
+            else:
+                action, status = step.action, "created"
+
+            self.log.info(f"Running step {step.name} ({action})...")
+            start = time.perf_counter()
+            if not getattr(self.project(step), action)(**step.arguments):
+                # e.g. the project is no longer detected, do not record the step as done
+                raise RuntimeError(f"Build step {step.name} failed.")
+            self.results.append({"name": step.name, "status": status, "seconds": time.perf_counter() - start})
+            executed.add(step.name)
+            self.state[step.name] = {"inputs": step.inputs}
+            self.save_state()
+        return self.results
@@ -1,10 +1,28 @@
+from ..runner import CommandRunner
 from pathlib import Path
 from shutil import which
-import subprocess
+import platform
 import os
 import re
 import datetime
 
+def jupyter_data_dir():
+    """Return the user's Jupyter data directory, following jupyter_core's rules."""
+    if data_dir := os.environ.get("JUPYTER_DATA_DIR"):
+        return Path(data_dir)
+    match platform.system():
+        case "Windows":
+            return Path(os.environ.get("APPDATA") or Path.home()) / "jupyter"
+        case "Darwin":
+            return Path.home() / "Library" / "Jupyter"
+        case _:
+            return Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share") / "jupyter"
+
+def system_jupyter_dir():
+    if platform.system() == "Windows":
+        return Path(os.environ.get("PROGRAMDATA", "C:\\ProgramData")) / "jupyter"
+    return Path("/usr/local/share/jupyter")
+
 class Project:
 
     project_type = "project"
@@ -20,9 +38,10 @@ class Project:
         test = r"!<>=,"
         return not any(x in test for x in v)
 
-    def __init__(self, project_path, env_base_path, log, base_cmd = [], env_type=None, env_name="", force_init=False, dry_run=False, **kwargs):
+    def __init__(self, project_path, env_base_path, log, base_cmd = [], env_type=None, env_name="", force_init=False, dry_run=False, runner=None, **kwargs):
         self.force_init = force_init
         self.dry_run = dry_run
+        self.runner = runner or CommandRunner()
         self.project_path = Path(project_path)
         self.env_base_path = env_base_path
         self.env_type = env_type or self.__class__.project_type
@@ -68,9 +87,29 @@ class Project:
     def create_kernel(self, user=False, name="", display_name="", prefix=""):
         return True
 
+    def update_environment(self, **kwargs):
+        return True
+
+    def kernelspec_path(self, user=False, name="", prefix="", **kwargs):
+        """Return the directory create_kernel installs the kernelspec to, or None if it is not known in advance."""
+        if user:
+            base = jupyter_data_dir()
+        elif prefix:
+            base = Path(prefix) / "share" / "jupyter"
+        else:
+            base = system_jupyter_dir()
+        return base / "kernels" / (name or self.env_name).lower()
+
+    def watched_files(self):
+        """Return the files whose changes should trigger update_environment."""
+        return []
+
     def detect(self):
         return True
 
+    def kernel_time_to_ready(self):
+        return None
+
     @property
     def runtime(self):
         """
@@ -152,11 +191,7 @@ class Project:
             for k,v in env.items():
                 self.log.info(f"{k}={v}")
         if not self.dry_run:
-            for cmd in commands:
-                p = subprocess.Popen(cmd, env=(os.environ.copy() | env), shell=isinstance(cmd, str))
-                exit_code = p.wait()
-                if exit_code > 0:
-                    raise RuntimeError(f"Error! repo2kernel is aborting after the following command failed:\n{cmd}")
+            self.runner.run(commands, env)
         self.log.info("...success")
         return True
 
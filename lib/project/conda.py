@@ -34,7 +34,7 @@ class CondaProject(Project):
         self.detected = CondaProject.detect(self)
         if self.detected or force_init:
             self.base_cmd = ["conda", "run", "-p", str(self.env_path)]
-        if force_init:
+        if force_init and not self.dry_run:
             CondaProject.create_environment(self)
 
     @property
@@ -104,42 +104,54 @@ class CondaProject(Project):
     @Project.check_detected
     @Project.check_dependencies
     def create_environment(self, **kwargs):
-        if self.conda_env_initialized or self.env_type != "conda":
-            return True
-        elif self.dry_run:
-            self.log.info("Dry run enabled, will skip conda env creation and you will not see conda env creation command in the dry run output.")
+        cmds = self.create_environment_commands()
+        if not cmds:
             return True
+        return self.run(cmds, {})
 
+    def create_environment_commands(self):
+        """Return the commands creating the conda env, or an empty list if there is nothing to create."""
+        if self.conda_env_initialized or self.env_type != "conda":
+            return []
         cmd = ["conda", "env", "create", "-f",]
         if self.detected:
-            cmd.append(str(self.binder_path("environment.yml")))
+            cmd.append(str(self.binder_path("environment.yml").resolve()))
         else:
-            cmd.append(str(EMPTY_CONDA_ENV))
-        cmd.extend(["-p", str(self.env_path)])
-        result = self.run([cmd], {})
-        return result
+            cmd.append(str(EMPTY_CONDA_ENV.resolve()))
+        cmd.extend(["-p", str(self.env_path.resolve())])
+        return [cmd]
 
     @Project.check_dependencies
     def create_kernel(self, user=False, name="", display_name="", prefix=""):
         return True
 
+    def watched_files(self):
+        return [self.env_file]
+
+    @Project.check_detected
+    @Project.check_dependencies
+    def update_environment(self, **kwargs):
+        """Apply changes to environment.yml to the existing conda env, without removing packages."""
+        if not self.conda_env_initialized:
+            self.log.warning(f"No conda environment found at {self.env_path}, run create first.")
+            return False
+        return self.run([["conda", "env", "update", "-p", str(self.env_path), "-f", str(self.env_file)]], {})
+
     @property
     def python_version(self):
-        """Detect whether a python version is declared in environment.yml
+        """Return the python version declared in environment.yml, if any
         """
-        for dep in self.env_file_dependencies():         
-            if isinstance(dep, str) and PYTHON_VERSION_REGEX.match(dep):
-                return True
-                break
+        for dep in self.env_file_dependencies():
+            if isinstance(dep, str) and (m := PYTHON_VERSION_REGEX.match(dep)):
+                return m.group(1)
 
     @property
     def r_version(self):
-        """Detect whether an R version is declared in environment.yml
+        """Return the R version declared in environment.yml, if any
         """
         for dep in self.env_file_dependencies():
-            if isinstance(dep, str) and R_VERSION_REGEX.match(dep):
-                return True
-                break
+            if isinstance(dep, str) and (m := R_VERSION_REGEX.match(dep)):
+                return m.group(1)
 
     def detect(self):
         """Check if current repo contains a Conda project."""
@@ -1,5 +1,5 @@
 from .conda import CondaProject
-from .base import Project
+from .base import Project, jupyter_data_dir
 from repo2docker.buildpacks import JuliaProjectTomlBuildPack
 
 import platform
@@ -15,6 +15,8 @@ class JuliaProject(CondaProject, JuliaProjectTomlBuildPack):
     default_interpreter_base_dir = Path(os.environ.get("JULIAUP_DEPOT_PATH", "/usr/local/julia/"))
     default_kernel_location = (Path("%PROGRAMDATA/jupyter" if platform.system() == 'Windows' else "/usr/local/share/jupyter")).resolve()
 
+    _all_julias = None
+
     def __init__(self, project_path, env_base_path, log, **kwargs):
         kwargs["env_type"] = kwargs.get("env_type", "julia")
         CondaProject.__init__(self, project_path, env_base_path, log, **kwargs)
@@ -25,6 +27,13 @@ class JuliaProject(CondaProject, JuliaProjectTomlBuildPack):
         else:
             self.julia_depot_path = str(self.env_path)
 
+    @property
+    def all_julias(self):
+        # JuliaProjectTomlBuildPack caches the list of Julia versions per instance, fetch it only once per process instead
+        if JuliaProject._all_julias is None:
+            JuliaProject._all_julias = JuliaProjectTomlBuildPack.all_julias.fget(self)
+        return JuliaProject._all_julias
+
     def julia_env(self):
         return {
             'JULIAUP_DEPOT_PATH': str(self.interpreter_base_dir),
@@ -38,7 +47,7 @@ class JuliaProject(CondaProject, JuliaProjectTomlBuildPack):
         if interpreter_base_dir:
             self.interpreter_base_dir = Path(interpreter_base_dir)
 
-        v = self.interpreter_version
+        v = self.interpreter_version()
         cmds = [
             ["juliaup", "add", v],
             #["julia", f"+{v}", f"--project={self.project_path}", "-e", "using Pkg; Pkg.instantiate(); Pkg.resolve(); Pkg.instantiate();"]
@@ -48,6 +57,28 @@ class JuliaProject(CondaProject, JuliaProjectTomlBuildPack):
 
         return True
 
+    def watched_files(self):
+        return [self.binder_path(f) for f in ["Project.toml", "JuliaProject.toml", "Manifest.toml", "JuliaManifest.toml"]]
+
+    @Project.check_detected
+    @Project.check_dependencies
+    def update_environment(self, interpreter_base_dir="", **kwargs):
+        """Instantiate the project's packages in the Julia depot."""
+        if interpreter_base_dir:
+            self.interpreter_base_dir = Path(interpreter_base_dir)
+        cmds = [
+            ["julia", f"+{self.interpreter_version()}", f"--project={self.binder_dir}", "-e", "using Pkg; Pkg.instantiate();"]
+        ]
+        return self.run(cmds, self.julia_env())
+
+    def kernelspec_path(self, user=False, name="", prefix="", **kwargs):
+        # IJulia appends the Julia major.minor version to the kernel name
+        major_minor = ".".join(self.interpreter_version().split(".")[:2])
+        specname = f"{(name or self.env_name).lower().replace(' ', '-')}-{major_minor}"
+        if user:
+            return jupyter_data_dir() / "kernels" / specname
+        return Path(prefix or self.default_kernel_location) / "kernels" / specname
+
     @Project.check_detected
     def create_kernel(self, name="", display_name = "", user=False, prefix="", **kwargs):
         _name = name or self.env_name
@@ -60,11 +91,10 @@ class JuliaProject(CondaProject, JuliaProjectTomlBuildPack):
             pass # use the JUPYTER_DATA_DIR from, or the default user location for IJulia
 
         cmds = [
-            ["julia", f"+{self.interpreter_version}", "-e", f"using Pkg; Pkg.add(\"IJulia\"); using IJulia; installkernel(\"{_name}\", \"--project={self.project_path}\", displayname=\"{_display_name}\", env=Dict(\"JULIA_DEPOT_PATH\"=>\"{self.julia_depot_path}\"));"],
+            ["julia", f"+{self.interpreter_version()}", "-e", f"using Pkg; Pkg.add(\"IJulia\"); using IJulia; installkernel(\"{_name}\", \"--project={self.project_path}\", displayname=\"{_display_name}\", env=Dict(\"JULIA_DEPOT_PATH\"=>\"{self.julia_depot_path}\"));"],
         ]
         self.run(cmds, env)
         return True
 
-    @property
     def interpreter_version(self):
         return super().julia_version
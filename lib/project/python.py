@@ -1,7 +1,29 @@
 from .conda import CondaProject
 from .base import Project
+import platform
+import subprocess
 import tomllib
 
+# Starts a kernel with the environment's python and prints the seconds until it replies to kernel_info
+KERNEL_TIME_TO_READY_SCRIPT = """
+import os, subprocess, sys, tempfile, time
+from jupyter_client.blocking import BlockingKernelClient
+from jupyter_client.connect import write_connection_file
+with tempfile.TemporaryDirectory() as d:
+    f, _ = write_connection_file(os.path.join(d, "kernel.json"))
+    start = time.perf_counter()
+    p = subprocess.Popen([sys.executable, "-m", "ipykernel_launcher", "-f", f], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    client = BlockingKernelClient()
+    client.load_connection_file(f)
+    client.start_channels()
+    try:
+        client.wait_for_ready(timeout=%d)
+        print(time.perf_counter() - start)
+    finally:
+        client.stop_channels()
+        p.kill()
+"""
+
 class PythonProject(CondaProject):
 
     project_type = "python"
@@ -9,6 +31,7 @@ class PythonProject(CondaProject):
     default_python_version="3"
     dependencies = ["uv"]
     kernel_package_py = "ipykernel"
+    kernel_ready_timeout = 120
 
     def __init__(self, project_path, env_base_path, log, **kwargs):
         super().__init__(project_path, env_base_path, log, **kwargs)
@@ -17,7 +40,7 @@ class PythonProject(CondaProject):
 
     @Project.check_detected
     @CondaProject.conda_install_dependencies
-    def create_environment(self, interpreter_base_dir=""):
+    def create_environment(self, interpreter_base_dir="", precompile=False):
         if not super().python_version: # python was not installed from environment.yml
             if self.conda_env_initialized: # use conda to install python
                 v = self.python_version
@@ -32,6 +55,17 @@ class PythonProject(CondaProject):
                 ]
                 self.run(cmds, env)
 
+        cmds = self.dependency_install_commands()
+        cmds.append([*self.base_cmd, "uv", "pip", "install", self.kernel_package_py])
+
+        self.run(cmds, {"VIRTUAL_ENV": str(self.env_path) })
+
+        if precompile:
+            self.precompile_bytecode()
+
+        return True
+
+    def dependency_install_commands(self):
         cmds = []
         if self.dependency_file:
             match self.dependency_file.name:
@@ -43,13 +77,54 @@ class PythonProject(CondaProject):
                     cmds.append([*self.base_cmd, "uvx", "pipenv", "install", "--skip-lock", "--dev"])
                 case "requirements.txt":
                     cmds.append([*self.base_cmd, "uv", "pip", "install", "-r", str(self.dependency_file)])
+        return cmds
 
-        cmds.append([*self.base_cmd, "uv", "pip", "install", self.kernel_package_py])
+    def watched_files(self):
+        return [self.binder_path(f) for f in ["requirements.txt", "Pipfile", "Pipfile.lock", "setup.py", "pyproject.toml"]]
 
-        self.run(cmds, {"VIRTUAL_ENV": str(self.env_path) })
+    @Project.check_detected
+    def update_environment(self, precompile=False, **kwargs):
+        """Install the project's dependencies into the existing environment."""
+        if not self.env_path.exists():
+            self.log.warning(f"No environment found at {self.env_path}, run create first.")
+            return False
+        self.run(self.dependency_install_commands(), {"VIRTUAL_ENV": str(self.env_path) })
+        if precompile:
+            self.precompile_bytecode()
+        return True
+
+    @property
+    def python_executable(self):
+        if platform.system() == 'Windows':
+            return self.env_path / "Scripts" / "python.exe"
+        return self.env_path / "bin" / "python"
 
+    def precompile_bytecode(self):
+        """Compile bytecode for all modules in the environment in parallel, so the first kernel start does not have to."""
+        cmds = [
+            [str(self.python_executable), "-m", "compileall", "-qq", "-j", "0", str(self.env_path)]
+        ]
+        try:
+            self.run(cmds, {})
+        except RuntimeError:
+            # compileall fails if any file has a syntax error, e.g. python 2 files in package test suites
+            self.log.warning(f"Could not compile bytecode for all modules in {self.env_path}, continuing.")
         return True
 
+    def kernel_time_to_ready(self):
+        """Return the seconds a kernel in the environment needs to become ready, or None if it could not be measured."""
+        if self.dry_run:
+            return None
+        try:
+            result = subprocess.run(
+                [str(self.python_executable), "-c", KERNEL_TIME_TO_READY_SCRIPT % self.kernel_ready_timeout],
+                capture_output=True, text=True, timeout=self.kernel_ready_timeout + 10
+            )
+            return float(result.stdout.strip())
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            self.log.warning(f"Could not measure kernel time to ready for {self.env_path}")
+            return None
+
     @Project.check_detected
     @CondaProject.conda_install_dependencies
     def create_kernel(self, user=False, name="", display_name="", prefix=""):
@@ -62,13 +137,9 @@ class PythonProject(CondaProject):
             'prefix': prefix
         }
 
-        if self.conda_env_initialized:
-            python_cmd = ["python", "-m"]
-        else:
-            python_cmd = ["uv", "run", "--active", "python", "-m"]
-
+        # Use the environment's interpreter directly, so the kernelspec refers to it rather than a wrapper
         cmds = [
-            [*self.base_cmd, *python_cmd, self.kernel_package_py, "install", *self.__class__.dict2cli(options)]
+            [str(self.python_executable), "-m", self.kernel_package_py, "install", *self.__class__.dict2cli(options)]
         ]
 
         self.run(cmds, { "VIRTUAL_ENV": str(self.env_path) })
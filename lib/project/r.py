@@ -58,6 +58,12 @@ class RCondaProject(CondaProject, RBuildPack):
         self.conda_install(self.kernel_package_r)
         self.conda_install("r-devtools")
 
+        self.run(self.package_install_commands(), {})
+        # TODO: remove temp package directories
+
+        return True
+
+    def package_install_commands(self):
         cmds = []
         repo = self.get_rspm_snapshot_url()
 
@@ -70,11 +76,22 @@ class RCondaProject(CondaProject, RBuildPack):
             cmds.append(
                 [*self.base_cmd, *self.r_default_opts, f"devtools::install_local('{f.parent}', repos='{repo}')"]
             )
+        return cmds
 
-        self.run(cmds, {})
-        # TODO: remove temp package directories
+    def watched_files(self):
+        return [self.binder_path("install.R"), self.project_path / "DESCRIPTION"]
 
-        return True
+    @Project.check_detected
+    def update_environment(self, **kwargs):
+        """Re-run install.R and reinstall the DESCRIPTION package in the existing environment."""
+        if not self.env_path.exists():
+            self.log.warning(f"No environment found at {self.env_path}, run create first.")
+            return False
+        return self.run(self.package_install_commands(), {})
+
+    def kernelspec_path(self, user=False, name="", prefix="", **kwargs):
+        # IRkernel::installspec uses 'ir' unless a name is given
+        return super().kernelspec_path(user=user, name=name or "ir", prefix=prefix)
 
     @Project.check_detected
     def create_kernel(self, **kwargs):
@@ -0,0 +1,171 @@
+from collections import deque
+import asyncio
+import os
+import signal
+import sys
+import time
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class RingBuffer:
+    """Keep the last `size` bytes written to it."""
+
+    def __init__(self, size):
+        self.size = size
+        self.chunks = deque()
+        self.length = 0
+
+    def write(self, data):
+        self.chunks.append(data)
+        self.length += len(data)
+        while self.length - len(self.chunks[0]) >= self.size:
+            self.length -= len(self.chunks.popleft())
+
+    def getvalue(self):
+        return b"".join(self.chunks)[-self.size:].decode(errors="replace")
+
+
+class CommandRunner:
+    """
+    Run commands as asyncio subprocesses.
+
+    Each command runs in its own process group, which is killed as a whole when the
+    command exceeds `command_timeout`, the build exceeds `build_timeout` (both in
+    seconds, counted from the creation of the runner), or the run is cancelled.
+    Output is passed through to `output` (a binary stream, by default stdout) and the
+    last `log_tail_size` bytes are kept to include in error messages. Once a command
+    exited, output still arriving (e.g. from background processes it started) is only
+    read for `output_grace_period` seconds.
+    """
+
+    kill_grace_period = 5
+    output_grace_period = 1
+
+    def __init__(self, command_timeout=None, build_timeout=None, log_tail_size=16 * 1024, output=None):
+        self.command_timeout = command_timeout
+        self.deadline = time.monotonic() + build_timeout if build_timeout else None
+        self.log_tail_size = log_tail_size
+        self.output = output
+
+    def timeout(self):
+        timeouts = [t for t in (self.command_timeout, self.deadline and self.deadline - time.monotonic()) if t is not None]
+        return max(min(timeouts), 0) if timeouts else None
+
+    def signal_group(self, proc, sig):
+        """Send sig to the command's process group, returning False if no process in it is left."""
+        try:
+            os.killpg(proc.pid, sig)
+            return True
+        except ProcessLookupError:
+            return False
+
+    async def wait_group(self, proc, timeout):
+        """Wait until the command and every other process in its group exited, returning False on timeout."""
+        deadline = time.monotonic() + timeout
+        try:
+            await asyncio.wait_for(proc.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        while self.signal_group(proc, 0):
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def kill(self, proc):
+        # kill the whole group even if the command itself exited, its children may still be running
+        try:
+            if os.name == "posix":
+                self.signal_group(proc, signal.SIGTERM)
+                if not await self.wait_group(proc, self.kill_grace_period):
+                    self.signal_group(proc, signal.SIGKILL)
+                    await proc.wait()
+            elif proc.returncode is None:
+                proc.terminate()
+                try:
+                    await asyncio.wait_for(proc.wait(), self.kill_grace_period)
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+        except ProcessLookupError:
+            pass
+
+    async def stream_output(self, reader, tail):
+        while chunk := await reader.read(READ_CHUNK_SIZE):
+            tail.write(chunk)
+            self.write_output(chunk)
+
+    async def output_pipe(self):
+        """Return (reader, transport, write_fd) for a pipe the command writes its output to."""
+        read_fd, write_fd = os.pipe()
+        reader = asyncio.StreamReader()
+        transport, _ = await asyncio.get_running_loop().connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(read_fd, "rb", buffering=0)
+        )
+        return reader, transport, write_fd
+
+    def write_output(self, data):
+        if self.output is not None:
+            self.output.write(data)
+            self.output.flush()
+        elif buffer := getattr(sys.stdout, "buffer", None):
+            buffer.write(data)
+            buffer.flush()
+        else:
+            sys.stdout.write(data.decode(errors="replace"))
+            sys.stdout.flush()
+
+    async def run_command(self, cmd, env):
+        # use our own pipe rather than asyncio's, so that it can be closed while background processes still hold it
+        reader, transport, write_fd = await self.output_pipe()
+        kwargs = {
+            "env": env,
+            "stdout": write_fd,
+            "stderr": asyncio.subprocess.STDOUT,
+            "start_new_session": True,
+        }
+        try:
+            if isinstance(cmd, str):
+                proc = await asyncio.create_subprocess_shell(cmd, **kwargs)
+            else:
+                proc = await asyncio.create_subprocess_exec(*cmd, **kwargs)
+        except BaseException:
+            transport.close()
+            raise
+        finally:
+            os.close(write_fd)
+
+        tail = RingBuffer(self.log_tail_size)
+        output = asyncio.ensure_future(self.stream_output(reader, tail))
+        try:
+            exit_code = await asyncio.wait_for(proc.wait(), self.timeout())
+        except asyncio.TimeoutError:
+            await self.kill(proc)
+            await self.close_output(output, transport)
+            raise RuntimeError(f"Error! repo2kernel is aborting after the following command timed out:\n{cmd}\nLast output:\n{tail.getvalue()}")
+        except asyncio.CancelledError:
+            await self.kill(proc)
+            await self.close_output(output, transport)
+            raise
+        await self.close_output(output, transport)
+
+        if exit_code != 0:
+            raise RuntimeError(f"Error! repo2kernel is aborting after the following command failed:\n{cmd}\nLast output:\n{tail.getvalue()}")
+        return exit_code
+
+    async def close_output(self, output, transport):
+        """Read the remaining output for at most `output_grace_period` seconds and close the pipe."""
+        await asyncio.wait([output], timeout=self.output_grace_period)
+        output.cancel()
+        transport.close()
+
+    async def run_commands(self, commands, env):
+        """Run `commands` one after the other, with `env` added to the current environment."""
+        full_env = os.environ | env
+        for cmd in commands:
+            await self.run_command(cmd, full_env)
+        return True
+
+    def run(self, commands, env):
+        return asyncio.run(self.run_commands(commands, env))
@@ -0,0 +1,134 @@
+from pathlib import Path
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+# inotify constants, see inotify(7)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ATTRIB
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Watcher:
+    """
+    Wait for changes to a set of files.
+
+    Uses inotify on the files' parent directories on Linux (so that editors replacing
+    files by renaming are noticed), and polls modification times elsewhere. Changes
+    made between calls to `wait` are reported by the next call. Use as a context
+    manager to release the inotify file descriptor.
+    """
+
+    def __init__(self, paths, debounce=1.0, poll_interval=1.0):
+        self.paths = set()
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.fd = None
+        self.libc = None
+        self.watches = {}
+        self.state = {}
+        if sys.platform.startswith("linux"):
+            self.init_inotify()
+        self.set_paths(paths)
+
+    def init_inotify(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            return # fall back to polling
+        self.libc = libc
+        self.fd = fd
+
+    def set_paths(self, paths):
+        """Change the set of watched files, keeping the changes to still watched files that were not reported yet."""
+        paths = {Path(p).absolute() for p in paths}
+        self.state.update(self.snapshot(paths - self.paths))
+        self.paths = paths
+        if self.fd is not None:
+            watched = set(self.watches.values())
+            for directory in {p.parent for p in self.paths} - watched:
+                if not directory.is_dir():
+                    continue
+                wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+                if wd >= 0:
+                    self.watches[wd] = directory
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read_events(self):
+        """Return the watched paths affected by pending inotify events."""
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if wd in self.watches and name:
+                path = self.watches[wd] / os.fsdecode(name)
+                if path in self.paths:
+                    changed.add(path)
+        return changed
+
+    def snapshot(self, paths=None):
+        state = {}
+        for p in self.paths if paths is None else paths:
+            try:
+                st = p.stat()
+                state[p] = (st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                state[p] = None
+        return state
+
+    def wait_inotify(self):
+        changed = set()
+        while not changed:
+            select.select([self.fd], [], [])
+            changed |= self.read_events()
+        # debounce: keep collecting until no events arrive for `debounce` seconds
+        while select.select([self.fd], [], [], self.debounce)[0]:
+            changed |= self.read_events()
+        return changed
+
+    def wait_polling(self):
+        before = {p: self.state.get(p) for p in self.paths}
+        after = self.snapshot()
+        while after == before:
+            time.sleep(self.poll_interval)
+            after = self.snapshot()
+        # debounce: wait until the files stop changing for `debounce` seconds
+        while True:
+            time.sleep(self.debounce)
+            settled = self.snapshot()
+            if settled == after:
+                break
+            after = settled
+        self.state = after
+        return {p for p in self.paths if before[p] != after[p]}
+
+    def wait(self):
+        """Block until at least one watched file changed and return the changed paths."""
+        if self.fd is not None:
+            return self.wait_inotify()
+        return self.wait_polling()
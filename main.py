@@ -1,13 +1,22 @@
 import repo2docker.contentproviders
 from lib import PythonProject, CondaProject, RCondaProject, JuliaProject
-from lib import Dataverse
+from lib import Dataverse, Zenodo
+from lib import preferred_provider
+from lib import Deduplicator
+from lib import CommandRunner
+from lib import Watcher
+from lib import DetectCache, detect_tree, project_roots
+from lib import BuildPlan, PlanExecutor
 import argparse
+import json
+from pathlib import Path
 from shutil import which
 
 # Exit codes
 SUCCESS = 0
 NOTHING_FOUND = 2
 CREATION_FAILED = 3
+DEDUPE_FAILED = 4
 
 # List of supported project languages
 LANGUAGES = [
@@ -32,6 +41,8 @@ def get_argparser():
     fetch_parser = subparsers.add_parser('fetch', help='fetch a project from an online datasource')
     detect_parser = subparsers.add_parser('detect', help='detect a directory for depedencies and output results')
     create_parser = subparsers.add_parser('create', help='create kernel for a directory')
+    watch_parser = subparsers.add_parser('watch', help='watch dependency files of a directory and update its environments when they change')
+    dedupe_parser = subparsers.add_parser('dedupe', help='replace identical files in created environments with links')
 
     fetch_parser.add_argument('url', help='URL to fetch. This program supports XYZ kinds of URLs')
     fetch_parser.add_argument('target', help='Where the downloaded project will be saved')
@@ -39,6 +50,12 @@ def get_argparser():
     fetch_parser.add_argument('--dataverse-json', help='Specify a JSON file containing additional dataverse instances.', action='append')
 
     detect_parser.add_argument('directory', help='Project to detect')
+    detect_parser.add_argument('--recursive', action='store_true', help='detect every project root below directory instead of directory itself')
+    detect_parser.add_argument('--depth', type=int, default=1, help='with --recursive, how many levels below directory the project roots are (default: 1)')
+    detect_parser.add_argument('--json', dest='json_output', action='store_true', help='output one JSON object per project root')
+    detect_parser.add_argument('--jobs', type=int, help='with --recursive, number of worker processes (default: number of CPUs)')
+    detect_parser.add_argument('--cache', help='with --recursive, file caching results for unchanged directories (default: ~/.cache/repo2kernel/detect.json)')
+    detect_parser.add_argument('--no-cache', action='store_true', help='with --recursive, do not read or write cached results')
 
     create_parser.add_argument('directory', help='Project to create kernel for')
     create_parser.add_argument('--dry-run', action='store_true', help='if enabled, will only print the commands to be run, not actually execute them')
@@ -48,6 +65,22 @@ def get_argparser():
     create_parser.add_argument('--kernel-user', action='store_true', help='whether to install the kernel only for the current user')
     create_parser.add_argument('--kernel-prefix', help='path prefix for kernel install location')
     create_parser.add_argument('--kernel-display-name', help='display name of the kernel')
+    create_parser.add_argument('--precompile', action='store_true', help='precompile Python bytecode for the whole environment after installation, for faster kernel startup')
+    create_parser.add_argument('--command-timeout', type=float, help='abort if a single command takes longer than this many seconds')
+    create_parser.add_argument('--build-timeout', type=float, help='abort if creating the environments and kernels takes longer than this many seconds')
+    create_parser.add_argument('--build-report', help='write a JSON report with build timings (including kernel time to ready) to this file')
+    create_parser.add_argument('--export-plan', help='write the build plan (steps, their inputs, outputs and dependencies) as JSON to this file')
+    create_parser.add_argument('--plan', dest='plan_file', help='execute a build plan written with --export-plan instead of detecting the projects in directory')
+
+    watch_parser.add_argument('directory', help='Project to watch')
+    watch_parser.add_argument('--env-name', help='name of the environment')
+    watch_parser.add_argument('--base-env-dir', required=True, help='base path under which the environment for the project was created')
+    watch_parser.add_argument('--debounce', type=float, default=1.0, help='seconds to wait for further changes before updating')
+
+    dedupe_parser.add_argument('--base-env-dir', required=True, help='base path under which environments were created')
+    dedupe_parser.add_argument('--link-mode', choices=Deduplicator.link_modes, default='hardlink', help='how to replace duplicate files (reflinks require a filesystem supporting them, e.g. btrfs or xfs)')
+    dedupe_parser.add_argument('--min-size', type=int, default=1, help='ignore files smaller than this many bytes')
+    dedupe_parser.add_argument('--dry-run', action='store_true', help='if enabled, will only report duplicates, not replace them')
 
     return parser
 
@@ -61,7 +94,7 @@ class CliCommands():
     # List of supported project store classes
     CONTENT_PROVIDERS = [
         repo2docker.contentproviders.Local,
-        repo2docker.contentproviders.Zenodo,
+        Zenodo,
         Dataverse,
         repo2docker.contentproviders.Mercurial,
         repo2docker.contentproviders.Git,
@@ -78,7 +111,7 @@ class CliCommands():
             except ValueError:
                 pass
 
-        for json_file in dataverse_json:
+        for json_file in dataverse_json or []:
             Dataverse.add_settings_file(json_file)
 
         return cps
@@ -96,11 +129,22 @@ class CliCommands():
         fetched. In the case of a git repository `ref` is the SHA-1 of a commit.
 
         Iterate through possible content providers until a valid provider,
-        based on URL, is found.
+        based on URL, is found. The provider matching the URL's scheme, host or
+        DOI target is tried first, so most URLs need only a single probe.
         """
 
+        try:
+            content_providers = self.content_providers(dataverse_json=dataverse_json)
+            preferred = preferred_provider(url, content_providers)
+        except RuntimeError as e:
+            self.log.error(e)
+            return NOTHING_FOUND
+
+        if preferred:
+            content_providers = [preferred, *(cp for cp in content_providers if cp is not preferred)]
+
         picked_content_provider = None
-        for ContentProvider in self.content_providers(dataverse_json=dataverse_json):
+        for ContentProvider in content_providers:
             cp = ContentProvider()
 
             spec = cp.detect(url, ref=ref)
@@ -111,15 +155,21 @@ class CliCommands():
 
         if picked_content_provider is None:
             self.log.error(f"No matching content provider found for {url}.")
+            return NOTHING_FOUND
 
         for log_line in picked_content_provider.fetch(
             spec, target, yield_output=False
         ):
             self.log.info(log_line)
 
+        return SUCCESS
+
 
     @classmethod
-    def detect(self, directory=""):
+    def detect(self, directory="", recursive=False, depth=1, json_output=False, jobs=None, cache=None, no_cache=False):
+        if recursive or json_output:
+            return self.detect_tree(directory, recursive=recursive, depth=depth, json_output=json_output, jobs=jobs, cache=cache, no_cache=no_cache)
+
         found = False
         for project_cls in PROJECT_TYPES:
             project = project_cls(directory, "", self.log, dry_run=True)
@@ -140,28 +190,135 @@ class CliCommands():
         return SUCCESS
 
     @classmethod
-    def create(self, directory="", dry_run=False, base_env_dir="", env_name="", interpreter_base_dir="", kernel_user=False, kernel_prefix="", kernel_display_name=""):
-        try:
-            base_project = CondaProject(directory, base_env_dir, self.log, env_name=env_name, dry_run=dry_run)
+    def detect_tree(self, directory="", recursive=False, depth=1, json_output=False, jobs=None, cache=None, no_cache=False):
+        if json_output:
+            self.log.setLevel(self.logging.WARNING) # keep stdout/stderr for results and real problems
+        root = Path(directory).absolute()
+        directories = project_roots(root, depth) if recursive else [root]
+        if no_cache or not recursive:
+            detect_cache = None
+        else:
+            detect_cache = DetectCache(cache) if cache else DetectCache()
+
+        found = False
+        for summary in detect_tree(directories, PROJECT_TYPES, cache=detect_cache, jobs=jobs):
+            found = found or bool(summary["types"])
+            if json_output:
+                print(json.dumps(summary), flush=True)
+            elif summary["types"]:
+                interpreters = ", ".join(f"{t} {v or 'not defined'}" for t, v in summary["interpreters"].items())
+                print(f"{summary['directory']}: {interpreters}")
+        if not found:
+            if not json_output:
+                print(f"No projects found in {directory}!")
+            return NOTHING_FOUND
+        return SUCCESS
 
-            if base_project.detected:
-                base_project.create_environment()
-                env_type = "conda"
+    @classmethod
+    def create(self, directory="", dry_run=False, base_env_dir="", env_name="", interpreter_base_dir="", kernel_user=False, kernel_prefix="", kernel_display_name="", precompile=False, command_timeout=None, build_timeout=None, build_report="", export_plan="", plan_file=""):
+        report = {"directory": directory, "steps": []}
+        code = SUCCESS
+        runner = CommandRunner(command_timeout=command_timeout, build_timeout=build_timeout)
+        try:
+            if plan_file:
+                try:
+                    with open(plan_file) as f:
+                        plan = BuildPlan.from_dict(json.load(f))
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    raise RuntimeError(f"Could not read build plan {plan_file}: {e}")
             else:
-                env_type = ""
+                projects = self.projects(directory, base_env_dir, env_name, dry_run=True)
+                kernel_options = {"user": kernel_user, "name": env_name, "display_name": kernel_display_name, "prefix": kernel_prefix}
+                plan = BuildPlan.for_projects(projects, interpreter_base_dir=interpreter_base_dir, precompile=precompile, kernel_options=kernel_options)
+            if not plan.steps:
+                self.log.warning(f"No projects found in {directory}, nothing to create.")
+            if export_plan:
+                with open(export_plan, "w") as f:
+                    f.write(plan.to_json(indent=2))
+            if dry_run:
+                for step in plan.ordered():
+                    self.log.info(f"Plan step {step.name}: {step.action} (depends on: {', '.join(step.depends_on) or 'nothing'})")
+                    for cmd in step.commands:
+                        self.log.info(f"  {cmd}")
+
+            executor = PlanExecutor(plan, plan.state_file(), PROJECT_TYPES, self.log, dry_run=dry_run, runner=runner)
+            for result in executor.execute():
+                step = plan.steps[result["name"]]
+                if build_report and step.action == "create_kernel" and result["status"] != "skipped":
+                    result["kernel_time_to_ready"] = executor.project(step).kernel_time_to_ready()
+                report["steps"].append(result)
 
-            for project_cls in LANGUAGES:
-                project = project_cls(directory, base_env_dir, self.log, env_type=env_type, env_name=env_name, dry_run=dry_run)
-                if project.detected:
-                    project.create_environment(interpreter_base_dir=interpreter_base_dir)
-                    project.create_kernel(user=kernel_user, name=env_name, display_name=kernel_display_name, prefix=kernel_prefix)
+        except RuntimeError as e:
+            self.log.warning(e)
+            report["error"] = str(e)
+            code = CREATION_FAILED
+
+        if build_report:
+            with open(build_report, "w") as f:
+                json.dump(report, f, indent=2)
+
+        return code
+
+    @classmethod
+    def projects(self, directory="", base_env_dir="", env_name="", **kwargs):
+        """Return the detected projects in directory, starting with the conda base project if any."""
+        base_project = CondaProject(directory, base_env_dir, self.log, env_name=env_name, **kwargs)
+        projects = [base_project] if base_project.detected else []
+        env_type = "conda" if base_project.detected else ""
+        for project_cls in LANGUAGES:
+            project = project_cls(directory, base_env_dir, self.log, env_type=env_type, env_name=env_name, **kwargs)
+            if project.detected:
+                projects.append(project)
+        return projects
+
+    @classmethod
+    def watch(self, directory="", base_env_dir="", env_name="", debounce=1.0):
+        """Update the environments of the projects in directory whenever their dependency files change.
 
+        Only the projects whose own files changed are updated, kernels are left in place.
+        """
+        # detect in dry run mode, constructing some projects (e.g. R) would otherwise create a conda env
+        projects = self.projects(directory, base_env_dir, env_name, dry_run=True)
+        if not projects:
+            self.log.error(f"No projects found in {directory}!")
+            return NOTHING_FOUND
+
+        # keep a single watcher open, so that changes made while updating are picked up by the next round
+        with Watcher([f for project in projects for f in project.watched_files()], debounce=debounce) as watcher:
+            try:
+                while True:
+                    self.log.info(f"Watching {len(watcher.paths)} files for changes...")
+                    changed = watcher.wait()
+                    self.log.info(f"Changed: {', '.join(str(f) for f in sorted(changed))}")
+
+                    # detect again, the changes may have affected e.g. which dependency file is used
+                    projects = self.projects(directory, base_env_dir, env_name, dry_run=True)
+                    for detected in projects:
+                        if not changed.intersection(Path(f).absolute() for f in detected.watched_files()):
+                            continue
+                        if not detected.env_path.exists():
+                            self.log.warning(f"No {detected.project_type} environment found at {detected.env_path}, run create first.")
+                            continue
+                        try:
+                            project = detected.__class__(directory, base_env_dir, self.log, env_type=detected.env_type, env_name=env_name)
+                            project.update_environment()
+                        except RuntimeError as e:
+                            self.log.warning(e)
+                    if projects:
+                        watcher.set_paths(f for project in projects for f in project.watched_files())
+            except KeyboardInterrupt:
+                return SUCCESS
+
+    @classmethod
+    def dedupe(self, base_env_dir="", link_mode="hardlink", min_size=1, dry_run=False):
+        try:
+            Deduplicator(base_env_dir, self.log, link_mode=link_mode, min_size=min_size, dry_run=dry_run).run()
         except RuntimeError as e:
             self.log.warning(e)
-            return CREATION_FAILED
+            return DEDUPE_FAILED
 
         return SUCCESS
-        
+
 
 if __name__ == "__main__":
     args = get_argparser().parse_args()